@@ -2,33 +2,102 @@ from crewai import Agent
 from typing import Dict, Optional, List, Any, ClassVar
 from pydantic import Field
 import logging
+import logging.handlers
+import queue
+import atexit
 from datetime import datetime
 import os
 import sys
 import yfinance as yf
-import json
+import orjson
 from tqdm import tqdm
 import time
 import yaml
 import pandas as pd
 import random
-from config.paths import PATHS
+import threading
+import concurrent.futures
+import contextvars
+import functools
+import requests
+from requests.adapters import HTTPAdapter
+from config.paths import PATHS, ensure_directories
 
 # Configure logging with more detailed formatting
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+class SecondCachedFormatter(logging.Formatter):
+    # Whole second and strftime text of the last timestamp formatted
+    _last_second = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        """Default asctime, reusing the strftime result within the same second"""
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        last_second = self._last_second
+        if second != last_second[0]:
+            last_second = (second, time.strftime(self.default_time_format, self.converter(record.created)))
+            self._last_second = last_second
+        return self.default_msec_format % (last_second[1], record.msecs)
+
+formatter = SecondCachedFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 # Setup logging directory and file
+ensure_directories(['YAHOO'])
 log_dir = PATHS['YAHOO']['LOGS']
-log_file = log_dir / f'{datetime.now().strftime("%Y-%m-%d")}_context_agent.log'
+
+# Run date shared by every path in this module; see _refresh_date
+_TODAY = datetime.now().strftime("%Y-%m-%d")
+
+def _refresh_date() -> str:
+    """Recompute the run date, for long-lived processes that cross midnight."""
+    global _TODAY
+    _TODAY = datetime.now().strftime("%Y-%m-%d")
+    return _TODAY
+
+log_file = log_dir / f'{_TODAY}_context_agent.log'
 file_handler = logging.FileHandler(log_file)
 file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
 
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+
+# Records also propagate to the root logger, so when that already writes
+# somewhere (the API server, or a script that configured logging) a console
+# handler of our own would print every line twice
+log_handlers = [file_handler]
+if not logging.getLogger().handlers:
+    log_handlers.append(console_handler)
+
+# Log calls only enqueue the record; a listener thread formats and writes it
+log_queue = queue.Queue(-1)
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Upper bound on the wait between fetch retries, in seconds
+MAX_RETRY_DELAY = 60
+
+# Shared HTTP session so Yahoo requests reuse pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+
+@functools.lru_cache(maxsize=256)
+def get_ticker(symbol: str) -> yf.Ticker:
+    """Return a cached Ticker for the symbol that uses the shared session."""
+    return yf.Ticker(symbol, session=SESSION)
+
+# Required configuration fields as (name, expected type, value check)
+_REQUIRED_FIELDS = (
+    ('RETRY_ATTEMPTS', int, lambda x: x > 0),
+    ('RETRY_DELAY', (int, float), lambda x: x >= 0),
+    ('RATE_LIMIT_DELAY', (int, float), lambda x: x >= 0),
+    ('BATCH_SIZE', int, lambda x: x > 0),
+    ('MAX_WORKERS', int, lambda x: x > 0)
+)
 
 class ConfigurationManager:
     """Configuration management for the ContextAgent"""
@@ -36,14 +105,14 @@ class ConfigurationManager:
     @staticmethod
     def setup_directories() -> Dict[str, str]:
         """Create and validate necessary directories."""
-        date_now = datetime.now().strftime('%Y-%m-%d')
+        date_now = _TODAY
         log_dir = PATHS['YAHOO']['LOGS']
         output_dir = PATHS['YAHOO']['OUTPUTS']
         
         try:
-            log_dir.mkdir(parents=True, exist_ok=True)
+            # Only hits the filesystem the first time in this process
+            ensure_directories(['YAHOO'])
             logger.info(f"Log directory validated: {log_dir}")
-            output_dir.mkdir(parents=True, exist_ok=True)
             logger.info(f"Output directory validated: {output_dir}")
             
             return {
@@ -58,25 +127,20 @@ class ConfigurationManager:
     @staticmethod
     def validate_config(config: Dict[str, Any]) -> bool:
         """Validate configuration parameters."""
-        required_fields = {
-            'RETRY_ATTEMPTS': (int, lambda x: x > 0),
-            'RETRY_DELAY': ((int, float), lambda x: x >= 0),
-            'RATE_LIMIT_DELAY': ((int, float), lambda x: x >= 0),
-            'BATCH_SIZE': (int, lambda x: x > 0)
-        }
-        
         try:
-            for field, (expected_type, validator) in required_fields.items():
-                if field not in config:
+            for field, expected_type, validator in _REQUIRED_FIELDS:
+                try:
+                    value = config[field]
+                except KeyError:
                     logger.error(f"Missing required configuration field: {field}")
                     return False
                     
-                if not isinstance(config[field], expected_type):
-                    logger.error(f"Invalid type for {field}. Expected {expected_type}, got {type(config[field])}")
+                if not isinstance(value, expected_type):
+                    logger.error(f"Invalid type for {field}. Expected {expected_type}, got {type(value)}")
                     return False
                     
-                if not validator(config[field]):
-                    logger.error(f"Invalid value for {field}: {config[field]}")
+                if not validator(value):
+                    logger.error(f"Invalid value for {field}: {value}")
                     return False
             
             logger.info("Configuration validation successful")
@@ -94,17 +158,21 @@ class ConfigurationManager:
                 logger.error("Symbols list cannot be empty")
                 return False
                 
-            if not all(isinstance(symbol, str) for symbol in symbols):
-                logger.error("All symbols must be strings")
-                return False
-                
-            if not all(symbol.strip() for symbol in symbols):
-                logger.error("Symbols cannot be empty strings")
-                return False
-                
-            if len(symbols) != len(set(symbols)):
-                logger.error("Duplicate symbols found in the list")
-                return False
+            # Single pass, stopping at the first invalid symbol
+            seen = set()
+            for symbol in symbols:
+                if not isinstance(symbol, str):
+                    logger.error("All symbols must be strings")
+                    return False
+                    
+                if not symbol.strip():
+                    logger.error("Symbols cannot be empty strings")
+                    return False
+                    
+                if symbol in seen:
+                    logger.error("Duplicate symbols found in the list")
+                    return False
+                seen.add(symbol)
             
             logger.info(f"Symbol list validation successful. Total symbols: {len(symbols)}")
             return True
@@ -113,11 +181,29 @@ class ConfigurationManager:
             logger.error(f"Error during symbols validation: {str(e)}")
             return False
 
+class RateLimiter:
+    """Spaces calls made from any thread at least min_interval seconds apart"""
+    
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.next_call_time = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Reserve the next call slot and sleep until it arrives"""
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_call_time - now
+            self.next_call_time = max(now, self.next_call_time) + self.min_interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
 class StockDataFetcher:
     """Handles stock data fetching operations"""
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        self.rate_limiter = RateLimiter(config['RATE_LIMIT_DELAY'])
         logger.info("StockDataFetcher initialized with configuration")
     
     def validate_price(self, price: float) -> bool:
@@ -128,22 +214,18 @@ class StockDataFetcher:
         """Fetch last close price for a given symbol with retries."""
         for attempt in range(self.config['RETRY_ATTEMPTS']):
             try:
-                # Add exponential backoff delay
-                if attempt > 0:
-                    delay = self.config['RETRY_DELAY'] * (2 ** attempt)
-                    logger.info(f"Retry attempt {attempt + 1}, waiting {delay} seconds...")
-                    time.sleep(delay)
-                
-                stock = yf.Ticker(symbol)
+                self.rate_limiter.wait()
+                stock = get_ticker(symbol)
                 history = stock.history(period="1d")
                 
                 if history.empty:
                     logger.warning(f"No data available for {symbol}")
                     return None
                     
-                last_close = history['Close'].iloc[-1]
+                closes = history['Close'].to_numpy()
+                last_close = float(closes[-1]) if closes.size else None
                 
-                if not self.validate_price(last_close):
+                if last_close is None or not self.validate_price(last_close):
                     logger.warning(f"Invalid price for {symbol}: {last_close}")
                     return None
                     
@@ -153,29 +235,83 @@ class StockDataFetcher:
             except Exception as e:
                 logger.error(f"Error fetching {symbol} (Attempt {attempt+1}/{self.config['RETRY_ATTEMPTS']}): {str(e)}")
                 if attempt < self.config['RETRY_ATTEMPTS'] - 1:
-                    time.sleep(self.config['RETRY_DELAY'])
+                    # Capped exponential backoff with jitter so parallel retries spread out
+                    delay = min(self.config['RETRY_DELAY'] * (1 << attempt), MAX_RETRY_DELAY) + random.random() * 0.5
+                    logger.info(f"Retry attempt {attempt + 2}, waiting {delay:.2f} seconds...")
+                    time.sleep(delay)
         
         return None
 
-    def process_batch(self, symbols_batch: List[str]) -> Dict[str, float]:
-        """Process a batch of symbols with rate limiting."""
-        batch_data = {}
-        for symbol in tqdm(symbols_batch, desc="Processing batch", unit="stock"):
-            # Add random delay between requests
-            delay = random.uniform(2, 5)
-            time.sleep(delay)
+    def fetch_all_last_close(self, symbols: List[str]) -> Dict[str, float]:
+        """Fetch last close prices for many symbols with a single download request."""
+        try:
+            self.rate_limiter.wait()
+            data = yf.download(
+                tickers=" ".join(symbols),
+                period="1d",
+                group_by='ticker',
+                threads=True,
+                progress=False,
+                auto_adjust=False,
+                session=SESSION
+            )
+        except Exception as e:
+            logger.error(f"Error downloading batch of {len(symbols)} symbols: {str(e)}")
+            return {}
+        
+        prices = {}
+        for symbol in symbols:
+            try:
+                # A single-ticker download may come back without the ticker column level
+                if isinstance(data.columns, pd.MultiIndex):
+                    closes = data[symbol]['Close'].dropna().to_numpy()
+                else:
+                    closes = data['Close'].dropna().to_numpy()
+            except KeyError:
+                continue
             
-            last_close = self.fetch_last_close(symbol)
-            if last_close is not None:
-                batch_data[symbol] = round(last_close, 2)
+            if not closes.size:
+                continue
+            last_close = float(closes[-1])
+            if self.validate_price(last_close):
+                prices[symbol] = last_close
+        return prices
+
+    def process_batch(self, symbols_batch: List[str]) -> Dict[str, float]:
+        """Process a batch of symbols with one bulk download, fetching any misses individually."""
+        batch_data = {
+            symbol: round(last_close, 2)
+            for symbol, last_close in self.fetch_all_last_close(symbols_batch).items()
+        }
+        
+        failed_symbols = [symbol for symbol in symbols_batch if symbol not in batch_data]
+        if not failed_symbols:
+            return batch_data
+        
+        logger.warning(f"Bulk download missed {len(failed_symbols)} symbols, fetching them individually")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.config['MAX_WORKERS']) as executor:
+            # Copy the caller's context per job so context-scoped log routing
+            # (the API's per-request log buffer) applies on the pool threads too
+            futures = {
+                executor.submit(contextvars.copy_context().run, self.fetch_last_close, symbol): symbol
+                for symbol in failed_symbols
+            }
+            for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Processing batch", unit="stock"):
+                last_close = future.result()
+                if last_close is not None:
+                    batch_data[futures[future]] = round(last_close, 2)
         return batch_data
 
     def save_data(self, data: Dict[str, float], date: str) -> bool:
         """Save data to JSON file with error handling."""
         try:
             filename = PATHS['YAHOO']['OUTPUTS'] / f'{date}_stock_last_close.json'
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=4)
+            # Serialize once and write it in a single call, synced once at the end
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+            with open(filename, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
             logger.info(f"Successfully saved data to {filename}")
             return True
         except Exception as e:
@@ -210,6 +346,7 @@ class ContextAgent(Agent):
         'RETRY_DELAY': 5,
         'RATE_LIMIT_DELAY': 1,
         'BATCH_SIZE': 50,
+        'MAX_WORKERS': 10,
         'SYMBOLS': [],  # Empty default list, will be loaded from YAML
         'HISTORICAL_CSV_PATH': None  # Optional CSV path
     }
@@ -226,9 +363,6 @@ class ContextAgent(Agent):
             config_path: Optional path to a YAML configuration file
             **kwargs: Additional arguments for the Agent base class
         """
-        print("="*80)
-        print("INITIALIZING CONTEXT AGENT")
-        print("="*80)
         logger.info("Initializing ContextAgent")
         
         # First create base Agent fields
@@ -238,7 +372,9 @@ class ContextAgent(Agent):
             "backstory": """I am a specialized agent that fetches and maintains up-to-date stock price data 
             for market analysis and decision making. I ensure data quality through validation and error handling.""",
             "allow_delegation": False,
-            "verbose": True
+            # Step-by-step console output is only useful when debugging; follows
+            # the same DEBUG env var that enables console logging in main.py
+            "verbose": bool(os.getenv("DEBUG"))
         }
         base_kwargs.update(kwargs)
         super().__init__(**base_kwargs)
@@ -246,35 +382,33 @@ class ContextAgent(Agent):
         # Setup configuration after super init
         if config:
             self.config.update(config)
-            print(f"Configuration dictionary provided with {len(config)} parameters")
+            logger.info(f"Configuration dictionary provided with {len(config)} parameters")
         
         # Load configuration from YAML if path provided
         if config_path:
-            print(f"Loading configuration from: {config_path}")
+            logger.info(f"Loading configuration from: {config_path}")
             yaml_config = self.load_config_from_yaml(config_path)
             if yaml_config is None:
                 error_msg = f"Failed to load configuration from {config_path}"
-                print(f"ERROR: {error_msg}")
+                logger.error(error_msg)
                 raise ValueError(error_msg)
             else:
-                print(f"Successfully loaded configuration with {len(yaml_config)} parameters")
+                logger.info(f"Successfully loaded configuration with {len(yaml_config)} parameters")
                 if 'SYMBOLS' in yaml_config:
-                    print(f"Loaded {len(yaml_config['SYMBOLS'])} symbols from configuration")
+                    logger.info(f"Loaded {len(yaml_config['SYMBOLS'])} symbols from configuration")
         
         # Validate final configuration
-        print("Validating configuration...")
+        logger.info("Validating configuration...")
         if not ConfigurationManager.validate_config(self.config):
             error_msg = "Invalid configuration provided"
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             raise ValueError(error_msg)
-        print("Configuration validation successful")
+        logger.info("Configuration validation successful")
             
         # Initialize data fetcher after config
-        print("Initializing data fetcher...")
+        logger.info("Initializing data fetcher...")
         self.data_fetcher = StockDataFetcher(self.config)
         logger.info("ContextAgent initialized successfully")
-        print("ContextAgent initialized successfully")
-        print("="*80)
 
     def execute_task(self, task: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute a task based on the given instruction and context."""
@@ -289,6 +423,9 @@ class ContextAgent(Agent):
             context = {"instruction": context}
         
         try:
+            # The server keeps this module loaded, so pin the date once per task
+            _refresh_date()
+            
             # Setup directories
             dirs = ConfigurationManager.setup_directories()
             self.config.update(dirs)
@@ -335,7 +472,7 @@ class ContextAgent(Agent):
         return {
             'config': self.config,
             'symbols': self.SYMBOLS,
-            'date': datetime.now().strftime('%Y-%m-%d')
+            'date': _TODAY
         }
 
     def load_config_from_yaml(self, config_path):
@@ -4,8 +4,18 @@ import os
 import sys
 import json
 import yaml
+import logging
 from datetime import datetime
 
+# Console logging for standalone runs only, set up before context_agent is
+# imported so it logs through this handler instead of adding its own
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+logger = logging.getLogger(__name__)
+
 # Add the root directory to sys.path
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, root_dir)  # Using insert(0, ...) to ensure our path takes precedence
@@ -13,8 +23,8 @@ sys.path.insert(0, root_dir)  # Using insert(0, ...) to ensure our path takes pr
 try:
     from config.paths import PATHS
 except ImportError as e:
-    print(f"Import error: {e}")
-    print(f"Python path: {sys.path}")
+    logger.error(f"Import error: {e}")
+    logger.error(f"Python path: {sys.path}")
     raise
 
 # Import using absolute path
@@ -25,22 +35,22 @@ def load_config(config_path):
     try:
         with open(config_path, 'r') as file:
             config = yaml.safe_load(file)
-        print(f"Configuration loaded from {config_path}")
+        logger.info(f"Configuration loaded from {config_path}")
         return config
     except Exception as e:
-        print(f"Error loading configuration: {str(e)}")
+        logger.error(f"Error loading configuration: {str(e)}")
         return None
 
 def test_context_agent():
     """Test the ContextAgent functionality with configuration from YAML."""
-    print("Starting ContextAgent test...")
+    logger.info("Starting ContextAgent test...")
     
     # Load configuration from YAML file
     config_path = PATHS['YAHOO']['CONFIG'] / 'agent_config.yaml'
     config = load_config(config_path)
     
     if not config:
-        print("Failed to load configuration. Exiting test.")
+        logger.error("Failed to load configuration. Exiting test.")
         return {'status': 'error', 'message': 'Configuration loading failed'}
     
     # Initialize the agent with loaded configuration
@@ -52,34 +62,35 @@ def test_context_agent():
     }
     
     # Execute the task
-    print("Fetching stock data...")
+    logger.info("Fetching stock data...")
     result = agent.execute_task("Fetch latest stock prices", test_context)
     
-    # Print the result
-    print(f"Task execution status: {result['status']}")
-    print(f"Message: {result['message']}")
+    # Log the result
+    logger.info(f"Task execution status: {result['status']}")
+    logger.info(f"Message: {result['message']}")
     
     # Check if data was saved correctly
-    date_now = datetime.now().strftime('%Y-%m-%d')
+    # Use the date the agent saved under rather than recomputing it
+    date_now = agent.config.get('DATE') or datetime.now().strftime('%Y-%m-%d')
     output_file = PATHS['YAHOO']['OUTPUTS'] / f'{date_now}_stock_last_close.json'
     
     if os.path.exists(output_file):
-        print(f"Output file created successfully: {output_file}")
+        logger.info(f"Output file created successfully: {output_file}")
         
         # Read and display the data
         with open(output_file, 'r') as f:
             data = json.load(f)
         
-        print("\nFetched stock prices:")
+        logger.info("Fetched stock prices:")
         for symbol, price in data.items():
-            print(f"{symbol}: ${price}")
+            logger.info(f"{symbol}: ${price}")
         
-        print(f"\nTotal symbols processed: {len(data)}")
+        logger.info(f"Total symbols processed: {len(data)}")
     else:
-        print(f"Error: Output file not found at {output_file}")
+        logger.error(f"Output file not found at {output_file}")
     
     return result
 
 if __name__ == "__main__":
     test_result = test_context_agent()
-    print("\nTest completed.")
\ No newline at end of file
+    logger.info("Test completed.")
\ No newline at end of file
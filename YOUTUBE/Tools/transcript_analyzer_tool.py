@@ -6,24 +6,33 @@ sys.path.insert(0, root_dir)
 
 from openai import AzureOpenAI
 import os
-import json
+import orjson
 import logging
+import concurrent.futures
+import contextvars
 from dotenv import load_dotenv
 import glob
+import re
 from datetime import datetime
 import pandas as pd
-from typing import Dict, List, Any
-from config.paths import PATHS
+from typing import Dict, List, Any, Optional
+from pydantic import BaseModel
+from config.paths import PATHS, ensure_directories
 
-# Initialize logging
+ensure_directories(['YOUTUBE'])
+
+# Initialize logging; basicConfig is a no-op when the API server has already
+# configured the root logger, so the log file is attached to this module's logger
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(PATHS['YOUTUBE']['LOGS'] / 'transcript_analysis.log')
-    ]
+    handlers=[logging.StreamHandler()]
 )
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+file_handler = logging.FileHandler(PATHS['YOUTUBE']['LOGS'] / 'transcript_analysis.log')
+file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+logger.addHandler(file_handler)
 
 # Load environment variables
 load_dotenv()
@@ -48,14 +57,120 @@ TRACKED_SYMBOLS = [
     'KHC', 'BIIB', 'LULU', 'EA', 'WDAY', 'PCAR', 'DXCM', 'CTSH', 'MRVL', 'CRM'
 ]
 
+# Number of transcripts analyzed concurrently
+ANALYSIS_WORKERS = 4
+
+# Company names the tracked symbols are usually referred to by in speech
+SYMBOL_ALIASES = {
+    'AAPL': ['apple'], 'MSFT': ['microsoft'], 'GOOGL': ['google', 'alphabet'],
+    'AMZN': ['amazon'], 'TSLA': ['tesla'], 'META': ['meta', 'meta platforms', 'facebook'], 'NVDA': ['nvidia'],
+    'PYPL': ['paypal'], 'INTC': ['intel'], 'CMCSA': ['comcast'], 'NFLX': ['netflix'],
+    'ADBE': ['adobe'], 'PEP': ['pepsi', 'pepsico'], 'CSCO': ['cisco'], 'AVGO': ['broadcom'],
+    'TXN': ['texas instruments'], 'COST': ['costco'], 'TMUS': ['t-mobile'], 'AMGN': ['amgen'],
+    'SBUX': ['starbucks'], 'QCOM': ['qualcomm'], 'GILD': ['gilead'], 'MDLZ': ['mondelez'],
+    'INTU': ['intuit'], 'ISRG': ['intuitive surgical'], 'VRTX': ['vertex'],
+    'REGN': ['regeneron'], 'ILMN': ['illumina'], 'ADI': ['analog devices'], 'CSX': ['csx'],
+    'MU': ['micron'], 'BKNG': ['booking'], 'AMAT': ['applied materials'],
+    'ADP': ['automatic data processing'], 'MNST': ['monster'], 'MELI': ['mercado libre'],
+    'ADSK': ['autodesk'], 'JD': ['jd.com', 'jingdong'], 'LRCX': ['lam research'], 'EBAY': ['ebay'],
+    'KHC': ['kraft heinz', 'kraft'], 'BIIB': ['biogen'], 'LULU': ['lululemon', 'lulu'],
+    'EA': ['electronic arts'], 'WDAY': ['workday'], 'PCAR': ['paccar'], 'DXCM': ['dexcom'],
+    'CTSH': ['cognizant'], 'MRVL': ['marvell'], 'CRM': ['salesforce']
+}
+
+# Cheap pre-filter: transcripts that never mention a tracked symbol or one of
+# its company names are not worth sending to the model. Tickers match
+# case-sensitively so words like "cost" or "mu" don't count as mentions;
+# company names match in any case
+_MENTION_RE = re.compile(
+    r"\b(?:(?-i:" + "|".join(re.escape(symbol) for symbol in TRACKED_SYMBOLS) + r")|"
+    + "|".join(re.escape(alias) for aliases in SYMBOL_ALIASES.values() for alias in aliases)
+    + r")\b",
+    re.IGNORECASE
+)
+
+class StockMention(BaseModel):
+    """What a transcript says about one tracked stock"""
+    symbol: str
+    last_close: Optional[float]
+    direction: Optional[str]
+    resistance_levels: List[float]
+    support_levels: List[float]
+    indicators: List[str]
+    sentiment: Optional[str]
+    summary: str
+
+class TranscriptAnalysis(BaseModel):
+    """Response schema enforced on the model for transcript analysis"""
+    stocks: List[StockMention]
+
+# Static part of the analysis prompt; the symbol list is filled in once per
+# analyzer and the transcript is appended per call
+_ANALYZE_PROMPT_TMPL = """
+Analyze the following transcript for insights about these specific stocks ONLY:
+{symbols_with_prices}
+
+For each of these symbols that is explicitly mentioned in the transcript:
+1. Extract ONLY the key points that are explicitly stated
+2. If support/resistance levels are mentioned, include them
+3. If technical indicators are discussed, list them
+4. If a clear direction or sentiment is stated, include it
+5. Create a brief summary of what was actually said about the stock
+
+Validation Rules:
+- Use the last close prices to validate extracted information:
+  * Support levels must be below the last close price
+  * Resistance levels must be above the last close price
+  * If a mentioned level doesn't make sense relative to last close, exclude it
+- For technical indicators:
+  * RSI values should be between 0 and 100
+  * MACD values should be reasonable relative to the stock price
+  * Moving averages should be in correct order (e.g., 20-day < 50-day < 200-day)
+- For sentiment and direction:
+  * Should be consistent with mentioned price movements
+  * Should align with technical indicators if mentioned
+
+Rules:
+- ONLY include stocks from the provided list that are explicitly mentioned
+- Use EXACT symbol names (e.g., 'GOOGL' not 'Google')
+- DO NOT make up or infer any information
+- If a stock is mentioned but no specific insights are given, still include it
+- Keep the summary concise and factual
+- Leave levels and indicators empty, and direction and sentiment null, when they are not mentioned
+
+Transcript:
+"""
+
+_ANALYZE_SYSTEM_PROMPT = "You are a financial analyst expert who extracts ONLY explicitly stated information from transcripts. DO NOT make up or infer any information. Only include stocks that are explicitly mentioned. Use exact symbol names. Validate all extracted information against the last close prices to ensure accuracy."
+
+def _read_transcript(transcript_file: str) -> Optional[Dict]:
+    """Read a single transcript file, returning None if it can't be loaded"""
+    try:
+        with open(transcript_file, 'rb') as f:
+            return orjson.loads(f.read())
+    except Exception as e:
+        logger.error(f"Error reading {transcript_file}: {str(e)}")
+        return None
+
 class YouTubeTranscriptAnalyzer:
     def __init__(self):
         self.description = "Analyzes YouTube video transcripts for stock market insights"
         self.last_close_prices = self._load_last_close_prices()
+        self._prompt_prefix = self._build_prompt_prefix()
         
     def _load_last_close_prices(self):
-        """Load the latest close prices from historical data"""
+        """Load the latest close prices, preferring the newest daily snapshot over the historical CSV"""
         try:
+            # Daily snapshots are date-prefixed, so the greatest name is the newest
+            with os.scandir(PATHS['YAHOO']['OUTPUTS']) as entries:
+                latest_snapshot = max(
+                    (entry.path for entry in entries if entry.name.endswith('_stock_last_close.json')),
+                    default=None
+                )
+            if latest_snapshot is not None:
+                with open(latest_snapshot, 'rb') as f:
+                    return orjson.loads(f.read())
+            
             # Read the CSV file
             df = pd.read_csv(PATHS['YAHOO']['OUTPUTS'] / 'historical_stock_prices.csv')
             
@@ -65,9 +180,17 @@ class YouTubeTranscriptAnalyzer:
             # Create a dictionary of symbol to last close price
             return dict(zip(df['SYMBOLS'], df[latest_date]))
         except Exception as e:
-            logging.error(f"Error loading last close prices: {str(e)}")
+            logger.error(f"Error loading last close prices: {str(e)}")
             return {}
         
+    def _build_prompt_prefix(self) -> str:
+        """Fill the analysis prompt with the tracked symbols and their last close prices"""
+        symbols_with_prices = "\n".join([
+            f"{symbol}: ${self.last_close_prices.get(symbol, 'N/A')}"
+            for symbol in TRACKED_SYMBOLS
+        ])
+        return _ANALYZE_PROMPT_TMPL.format_map({"symbols_with_prices": symbols_with_prices})
+        
     def _create_graph_nodes_and_relationships(self, stock_data: Dict) -> tuple[List[Dict], List[Dict]]:
         """Create graph nodes and relationships from stock data"""
         nodes = []
@@ -156,128 +279,86 @@ class YouTubeTranscriptAnalyzer:
             }]
         }
 
+    def _build_analysis(self, stocks: List[Dict]) -> Dict:
+        """Wrap the extracted stocks in the final analysis structure"""
+        return {
+            "analysis_id": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            "timestamp": datetime.now().isoformat(),
+            "source": {
+                "type": "youtube_transcript",
+                "model": deployment_name,
+                "version": "1.0"
+            },
+            "stocks": stocks
+        }
+
     def analyze_transcript(self, transcript_text: str) -> Dict:
         """Analyze a single transcript and return structured analysis"""
         try:
-            # Create a string of symbols with their last close prices
-            symbols_with_prices = "\n".join([
-                f"{symbol}: ${self.last_close_prices.get(symbol, 'N/A')}"
-                for symbol in TRACKED_SYMBOLS
-            ])
-            
-            prompt = f"""
-            Analyze the following transcript for insights about these specific stocks ONLY:
-            {symbols_with_prices}
-
-            For each of these symbols that is explicitly mentioned in the transcript:
-            1. Extract ONLY the key points that are explicitly stated
-            2. If support/resistance levels are mentioned, include them
-            3. If technical indicators are discussed, list them
-            4. If a clear direction or sentiment is stated, include it
-            5. Create a brief summary of what was actually said about the stock
-
-            Validation Rules:
-            - Use the last close prices to validate extracted information:
-              * Support levels must be below the last close price
-              * Resistance levels must be above the last close price
-              * If a mentioned level doesn't make sense relative to last close, exclude it
-            - For technical indicators:
-              * RSI values should be between 0 and 100
-              * MACD values should be reasonable relative to the stock price
-              * Moving averages should be in correct order (e.g., 20-day < 50-day < 200-day)
-            - For sentiment and direction:
-              * Should be consistent with mentioned price movements
-              * Should align with technical indicators if mentioned
-
-            Rules:
-            - ONLY include stocks from the provided list that are explicitly mentioned
-            - Use EXACT symbol names (e.g., 'GOOGL' not 'Google')
-            - DO NOT make up or infer any information
-            - If a stock is mentioned but no specific insights are given, still include it
-            - Keep the summary concise and factual
-            - Format response as JSON with this exact structure for each mentioned symbol:
-            {{
-                "stocks": [
-                    {{
-                        "symbol": "SYMBOL",
-                        "last_close": PRICE,  # Include the last close price for reference
-                        "direction": "bullish/bearish/neutral" or null if not mentioned,
-                        "resistance_levels": [PRICE] or [] if not mentioned,
-                        "support_levels": [PRICE] or [] if not mentioned,
-                        "indicators": ["INDICATOR1", "INDICATOR2"] or [] if not mentioned,
-                        "sentiment": "bullish/bearish/neutral" or null if not mentioned,
-                        "summary": "Brief summary of what was actually said about the stock"
-                    }}
-                ]
-            }}
-            
-            Transcript:
-            {transcript_text}
-            """
+            prompt = self._prompt_prefix + transcript_text + "\n"
             
-            response = client.chat.completions.create(
+            response = client.beta.chat.completions.parse(
                 model=deployment_name,
                 messages=[
-                    {"role": "system", "content": "You are a financial analyst expert who extracts ONLY explicitly stated information from transcripts. Your response must be a valid JSON object. DO NOT make up or infer any information. Only include stocks that are explicitly mentioned. Use exact symbol names. Validate all extracted information against the last close prices to ensure accuracy."},
+                    {"role": "system", "content": _ANALYZE_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
                 max_tokens=2000,
                 top_p=0.95,
-                response_format={"type": "json_object"}
+                response_format=TranscriptAnalysis
             )
             
-            raw_analysis = json.loads(response.choices[0].message.content)
-            
-            # Validate the response structure
-            if not isinstance(raw_analysis, dict) or 'stocks' not in raw_analysis:
-                logging.warning(f"Invalid response structure: {raw_analysis}")
-                return {
-                    "analysis_id": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                    "timestamp": datetime.now().isoformat(),
-                    "source": {
-                        "type": "youtube_transcript",
-                        "model": deployment_name,
-                        "version": "1.0"
-                    },
-                    "stocks": []
-                }
+            # The schema is enforced server-side; only a refusal leaves nothing parsed
+            parsed = response.choices[0].message.parsed
+            if parsed is None:
+                logger.warning(f"Model refused to analyze transcript: {response.choices[0].message.refusal}")
+                return self._build_analysis([])
             
             # Create the final analysis structure
-            analysis = {
-                "analysis_id": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                "timestamp": datetime.now().isoformat(),
-                "source": {
-                    "type": "youtube_transcript",
-                    "model": deployment_name,
-                    "version": "1.0"
-                },
-                "stocks": raw_analysis.get("stocks", [])
-            }
+            return self._build_analysis([stock.model_dump() for stock in parsed.stocks])
+            
+        except Exception as e:
+            logger.error(f"Error analyzing transcript: {str(e)}")
+            return self._build_analysis([])
+
+    def _process_transcript(self, transcript_file: str, transcript_data: Dict, analysis_dir: str):
+        """Analyze a single transcript and save its analysis file"""
+        try:
+            # Analyze transcript, skipping the model when no tracked symbol is mentioned
+            transcript_text = transcript_data['transcript']
+            if _MENTION_RE.search(transcript_text):
+                analysis = self.analyze_transcript(transcript_text)
+            else:
+                logger.info(f"No tracked symbols mentioned in {os.path.basename(transcript_file)}, skipping analysis")
+                analysis = self._build_analysis([])
+            
+            # Save individual analysis
+            analysis_filename = os.path.basename(transcript_file).replace('.json', '_analysis.json')
+            analysis_path = os.path.join(analysis_dir, analysis_filename)
             
-            return analysis
+            with open(analysis_path, 'wb') as f:
+                f.write(orjson.dumps(analysis, option=orjson.OPT_INDENT_2))
+            
+            logger.info(f"Processed {os.path.basename(transcript_file)} successfully")
             
         except Exception as e:
-            logging.error(f"Error analyzing transcript: {str(e)}")
-            return {
-                "analysis_id": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                "timestamp": datetime.now().isoformat(),
-                "source": {
-                    "type": "youtube_transcript",
-                    "model": deployment_name,
-                    "version": "1.0"
-                },
-                "stocks": []
-            }
+            logger.error(f"Error processing {transcript_file}: {str(e)}")
 
     def process_transcripts(self):
         """Process all transcripts in the latest output folder"""
         try:
-            # Find latest output folder
-            output_folders = glob.glob("YOUTUBE\\OUTPUTS\\*")
-            if not output_folders:
+            # Find latest output folder; folders are named by date so the
+            # greatest name is the newest
+            with os.scandir(PATHS['YOUTUBE']['OUTPUTS']) as entries:
+                latest_entry = max(
+                    (entry for entry in entries if entry.is_dir(follow_symlinks=False)),
+                    key=lambda entry: entry.name,
+                    default=None
+                )
+            if latest_entry is None:
                 raise FileNotFoundError("No output folders found in OUTPUTS directory")
-            latest_folder = max(output_folders, key=os.path.getmtime)
+            latest_folder = latest_entry.path
             
             # Process transcripts
             transcripts_path = os.path.join(latest_folder, "transcripts")
@@ -286,36 +367,36 @@ class YouTubeTranscriptAnalyzer:
             
             transcript_files = glob.glob(os.path.join(transcripts_path, "*.json"))
             
-            for transcript_file in transcript_files:
-                try:
-                    # Read transcript
-                    with open(transcript_file, 'r') as f:
-                        transcript_data = json.load(f)
-                    
-                    # Analyze transcript
-                    analysis = self.analyze_transcript(transcript_data['transcript'])
-                    
-                    # Save individual analysis
-                    analysis_filename = os.path.basename(transcript_file).replace('.json', '_analysis.json')
-                    analysis_path = os.path.join(latest_folder, "analysis", analysis_filename)
-                    os.makedirs(os.path.dirname(analysis_path), exist_ok=True)
-                    
-                    with open(analysis_path, 'w') as f:
-                        json.dump(analysis, f, indent=2)
-                    
-                    logging.info(f"Processed {os.path.basename(transcript_file)} successfully")
-                    
-                except Exception as e:
-                    logging.error(f"Error processing {transcript_file}: {str(e)}")
+            # Read all transcripts up front so the disk reads overlap. Jobs run in a
+            # copy of the caller's context so context-scoped log routing (the API's
+            # per-request log buffer) follows them onto the pool threads
+            with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, _read_transcript, transcript_file)
+                    for transcript_file in transcript_files
+                ]
+                transcripts = [future.result() for future in futures]
+            
+            analysis_dir = os.path.join(latest_folder, "analysis")
+            os.makedirs(analysis_dir, exist_ok=True)
+            
+            # Transcripts are independent, so analyze several at once to overlap model round-trips
+            with concurrent.futures.ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS) as executor:
+                for transcript_file, transcript_data in zip(transcript_files, transcripts):
+                    if transcript_data is not None:
+                        executor.submit(
+                            contextvars.copy_context().run,
+                            self._process_transcript, transcript_file, transcript_data, analysis_dir
+                        )
                     
         except Exception as e:
-            logging.error(f"Error in process_transcripts: {str(e)}")
+            logger.error(f"Error in process_transcripts: {str(e)}")
 
 def main():
-    logging.info("Starting transcript analysis")
+    logger.info("Starting transcript analysis")
     analyzer = YouTubeTranscriptAnalyzer()
     analyzer.process_transcripts()
-    logging.info("Transcript analysis completed")
+    logger.info("Transcript analysis completed")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
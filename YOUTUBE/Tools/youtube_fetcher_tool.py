@@ -14,9 +14,11 @@ It processes videos posted after a specified time (default: Friday 00:00 EST) un
 import requests
 from bs4 import BeautifulSoup
 import json
+import orjson
 from datetime import datetime, timedelta
 import os
 import concurrent.futures
+import contextvars
 import re
 import time
 from requests.exceptions import RequestException, SSLError
@@ -33,22 +35,20 @@ import threading
 from collections import defaultdict
 from dotenv import load_dotenv
 import yaml
-from config.paths import PATHS
+from config.paths import PATHS, ensure_directories
 from pathlib import Path
 
 # Configure logging
+ensure_directories(['YOUTUBE'])
 logs_dir = PATHS['YOUTUBE']['LOGS']
-logs_dir.mkdir(parents=True, exist_ok=True)
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(logs_dir / 'youtube_fetcher.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.StreamHandler()]
 )
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 # Add a custom formatter to handle Unicode characters in console output
 for handler in logger.handlers:
@@ -62,6 +62,12 @@ for handler in logger.handlers:
 tqdm.pandas = lambda *args, **kwargs: None
 tqdm.pandas()
 
+# basicConfig is a no-op when the API server has already configured the root
+# logger, so the log file is attached to this module's logger
+fetcher_file_handler = logging.FileHandler(logs_dir / 'youtube_fetcher.log', encoding='utf-8')
+fetcher_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+logger.addHandler(fetcher_file_handler)
+
 def load_config() -> Dict:
     """Load configuration from YAML file"""
     config_path = PATHS['YOUTUBE']['CONFIG'] / 'youtube_config.yaml'
@@ -212,12 +218,13 @@ class YouTubeFetcher:
         cache_file = self.cache_dir / f"stats_{video_id}.json"
         
         # Check cache first
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Error reading cache for video {video_id}: {str(e)}")
+        try:
+            with open(cache_file, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error reading cache for video {video_id}: {str(e)}")
         
         # Respect rate limits
         self.api_rate_limiter.wait('api')
@@ -315,12 +322,13 @@ class YouTubeFetcher:
         cache_file = self.cache_dir / f"details_{video_id}.json"
         
         # Check cache first
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Error reading details cache for video {video_id}: {str(e)}")
+        try:
+            with open(cache_file, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error reading details cache for video {video_id}: {str(e)}")
         
         url = f"https://www.youtube.com/watch?v={video_id}"
         headers = {
@@ -498,12 +506,12 @@ class YouTubeFetcher:
                 return []
             
             except (RequestException, json.JSONDecodeError, SSLError, MaxRetryError, TimeoutError) as e:
-                print(f"Error fetching video IDs for {channel_name} (Attempt {attempt+1}/{self.max_retries}): {str(e)}")
+                logger.error(f"Error fetching video IDs for {channel_name} (Attempt {attempt+1}/{self.max_retries}): {str(e)}")
                 if attempt < self.max_retries - 1:
-                    print(f"Retrying in {self.request_delay * (attempt + 1)} seconds...")
+                    logger.info(f"Retrying in {self.request_delay * (attempt + 1)} seconds...")
                     time.sleep(self.request_delay * (attempt + 1))
                 else:
-                    print(f"Failed to fetch video IDs for {channel_name} after {self.max_retries} attempts.")
+                    logger.error(f"Failed to fetch video IDs for {channel_name} after {self.max_retries} attempts.")
                     return []
         
         return []
@@ -657,7 +665,13 @@ class YouTubeFetcher:
                  position=0,
                  leave=True) as pbar:
             with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.channels)) as executor:
-                results = list(executor.map(self.process_channel, self.channels))
+                # Each channel runs in a copy of the caller's context so context-scoped
+                # log routing (the API's per-request log buffer) reaches the pool threads
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self.process_channel, channel)
+                    for channel in self.channels
+                ]
+                results = [future.result() for future in futures]
                 for result in results:
                     videos, collected, discarded, saved = result
                     all_videos.extend(videos)
@@ -716,13 +730,16 @@ class YouTubeFetcher:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         log_filename = logs_dir / f"{timestamp}.log"
         
-        # Reconfigure logging to use the new log file
+        # Reconfigure logging to use the new log file, keeping the module log file.
+        # The API server calls this on every run, so close the previous run's file;
+        # console output comes from the root logger, so no stream handler is added
         for handler in logger.handlers[:]:
-            logger.removeHandler(handler)
+            if handler is not fetcher_file_handler:
+                logger.removeHandler(handler)
+                handler.close()
         file_handler = logging.FileHandler(log_filename, encoding='utf-8')
         file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
         logger.addHandler(file_handler)
-        logger.addHandler(logging.StreamHandler())
 
         logger.info(f"All video information has been saved to '{date_dir}'")
         logger.info(f"Total number of videos across all channels: {len(all_videos)}")
@@ -6,10 +6,20 @@ sys.path.insert(0, root_dir)
 
 import json
 import glob
+import logging
 from datetime import datetime
+from pathlib import Path
 import weaviate
 from dotenv import load_dotenv
-from config.paths import PATHS
+from config.paths import PATHS, ensure_directories
+
+# Console logging for standalone runs; when imported by the API server the root
+# logger is already configured and this is a no-op
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -19,10 +29,10 @@ weaviate_url = os.getenv("WEAVIATE_URL")
 weaviate_api_key = os.getenv("WEAVIATE_API_KEY")
 
 if not weaviate_url or not weaviate_api_key:
-    print("Error: WEAVIATE_URL and WEAVIATE_API_KEY must be set in your .env file")
-    print("Please add these variables to your .env file:")
-    print("WEAVIATE_URL=your_weaviate_url")
-    print("WEAVIATE_API_KEY=your_weaviate_api_key")
+    logger.error("WEAVIATE_URL and WEAVIATE_API_KEY must be set in your .env file")
+    logger.error("Please add these variables to your .env file:")
+    logger.error("WEAVIATE_URL=your_weaviate_url")
+    logger.error("WEAVIATE_API_KEY=your_weaviate_api_key")
     sys.exit(1)
 
 if not weaviate_url.startswith("https://"):
@@ -165,18 +175,18 @@ def setup_schema():
         
         if "Stock" not in existing_classes:
             client.schema.create_class(stock_class)
-            print("Stock class created successfully")
+            logger.info("Stock class created successfully")
         else:
-            print("Stock class already exists")
+            logger.info("Stock class already exists")
             
         if "Analysis" not in existing_classes:
             client.schema.create_class(analysis_class)
-            print("Analysis class created successfully")
+            logger.info("Analysis class created successfully")
         else:
-            print("Analysis class already exists")
+            logger.info("Analysis class already exists")
             
     except Exception as e:
-        print(f"Error creating schema: {str(e)}")
+        logger.error(f"Error creating schema: {str(e)}")
 
 def process_analysis_file(file_path):
     """Process a single analysis file and store data in Weaviate"""
@@ -224,21 +234,29 @@ def process_analysis_file(file_path):
     )
 
 def main():
+    ensure_directories(['YOUTUBE'])
+    
     # Set up schema
     setup_schema()
     
-    # Find the latest analysis directory
-    output_dirs = sorted(PATHS['YOUTUBE']['OUTPUTS'].glob('*'))
-    if not output_dirs:
-        print("No output directories found")
+    # Find the latest analysis directory; folders are named by date so the
+    # greatest name is the newest
+    with os.scandir(PATHS['YOUTUBE']['OUTPUTS']) as entries:
+        latest_entry = max(
+            (entry for entry in entries if entry.is_dir(follow_symlinks=False)),
+            key=lambda entry: entry.name,
+            default=None
+        )
+    if latest_entry is None:
+        logger.warning("No output directories found")
         return
         
-    latest_dir = output_dirs[-1]
+    latest_dir = Path(latest_entry.path)
     analysis_dir = latest_dir / "analysis"
     
     # Process all analysis files
     for file_path in analysis_dir.glob("*_analysis.json"):
-        print(f"Processing {file_path}")
+        logger.info(f"Processing {file_path}")
         process_analysis_file(file_path)
 
 if __name__ == "__main__":
@@ -187,25 +187,13 @@ def graph_search(symbol: str) -> List[Dict[str, Any]]:
     except Exception as e:
         raise Exception(f"Error in graph search: {str(e)}")
 
-def refine_response_with_llm(query: str, analysis_result: Dict[str, Any]) -> str:
-    """
-    Use Azure OpenAI to generate a user-friendly response based on the analysis results
-    
-    Args:
-        query (str): The original user query
-        analysis_result (Dict[str, Any]): The analysis results from analyze_stock_query
-        
-    Returns:
-        str: A refined, user-friendly response
-    """
-    try:
-        prompt = f"""
+_REFINE_PROMPT_TMPL = """
 You are a helpful financial assistant. Based on the user's query and the analysis results below, generate a response that is clear, concise, and directly answers the query using only the most relevant information.
 
 User Query: {query}
 
 Analysis Results:
-{json.dumps(analysis_result, indent=2)}
+{analysis_results}
 
 Instructions:
 - Only include information directly related to the user's query.
@@ -216,6 +204,23 @@ Instructions:
 - If data is missing or unclear, explain that briefly.
 """
 
+def refine_response_with_llm(query: str, analysis_result: Dict[str, Any]) -> str:
+    """
+    Use Azure OpenAI to generate a user-friendly response based on the analysis results
+    
+    Args:
+        query (str): The original user query
+        analysis_result (Dict[str, Any]): The analysis results from analyze_stock_query
+        
+    Returns:
+        str: A refined, user-friendly response
+    """
+    try:
+        prompt = _REFINE_PROMPT_TMPL.format_map({
+            "query": query,
+            "analysis_results": json.dumps(analysis_result, indent=2)
+        })
+
         response = openai.chat.completions.create(
     model=deployment_name,
     messages=[
@@ -30,12 +30,18 @@ PATHS = {
     }
 }
 
-# Create all directories if they don't exist
-def ensure_directories():
-    """Create all necessary directories if they don't exist"""
-    for category in PATHS.values():
-        for path in category.values():
-            path.mkdir(parents=True, exist_ok=True)
+# Flat (category, path) list so ensure_directories doesn't re-walk PATHS
+_ALL_PATHS = [(category, path) for category, paths in PATHS.items() for path in paths.values()]
 
-# Initialize directories
-ensure_directories() 
\ No newline at end of file
+# Paths already created by this process
+_created_paths = set()
+
+def ensure_directories(categories=None):
+    """Create the directories for the given categories (all if None) if they don't exist"""
+    for category, path in _ALL_PATHS:
+        if categories is not None and category not in categories:
+            continue
+        if path in _created_paths:
+            continue
+        path.mkdir(parents=True, exist_ok=True)
+        _created_paths.add(path)
\ No newline at end of file
@@ -1,58 +1,50 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import subprocess
+from starlette.concurrency import run_in_threadpool
+from anyio import to_thread
+import asyncio
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Tuple
 import os
+import importlib
+import re
 from pydantic import BaseModel
 import logging
-from datetime import datetime
-from collections import deque
+from contextlib import asynccontextmanager
 
-# Configure logging with a rotating buffer
-class LogBuffer:
-    def __init__(self, max_size=1000):
-        self.buffer = deque(maxlen=max_size)
+# Make the project packages importable once, whatever the working directory
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
-    def add_log(self, log_entry):
-        self.buffer.append(log_entry)
+from request_logs import LogBuffer, LogHandler, REQ_LOGS
 
-    def get_recent_logs(self):
-        return list(self.buffer)
+# Configure root logger; echoing every record to stdout as well doubles the
+# formatting cost, so it is only done when DEBUG is set. Warnings and errors
+# are always echoed, since records logged outside a request (such as tools
+# failing to load at startup) are not returned by any endpoint
+console_handler = logging.StreamHandler(sys.stdout)
+if not os.getenv("DEBUG"):
+    console_handler.setLevel(logging.WARNING)
+log_handlers = [LogHandler(), console_handler]
 
-    def clear(self):
-        self.buffer.clear()
-
-# Create log buffer instance
-log_buffer = LogBuffer()
-
-class LogHandler(logging.Handler):
-    def emit(self, record):
-        try:
-            log_entry = {
-                'timestamp': datetime.now().isoformat(),
-                'level': record.levelname,
-                'message': self.format(record)
-            }
-            log_buffer.add_log(log_entry)
-        except Exception:
-            self.handleError(record)
-
-# Configure root logger
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        LogHandler()
-    ]
+    handlers=log_handlers
 )
 logger = logging.getLogger(__name__)
 
-print("PYTHON EXECUTABLE:", sys.executable)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the one-time startup work before the app starts serving"""
+    load_stock_analyzer()
+    configure_threadpool()
+    load_tools()
+    yield
 
-app = FastAPI(title="Stock Analysis API")
+app = FastAPI(title="Stock Analysis API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -63,107 +55,122 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_log_buffer(request: Request, call_next):
+    """Give each request its own log buffer"""
+    REQ_LOGS.set(LogBuffer())
+    return await call_next(request)
+
 class ChatRequest(BaseModel):
     query: str
 
+# Stock analyzer entry point, imported at startup or by the first /chat after a failed import
+analyze_stock_query = None
+stock_analyzer_error = None
+
+def load_stock_analyzer():
+    """Import the stock analyzer once instead of on every chat request"""
+    global analyze_stock_query, stock_analyzer_error
+    try:
+        analyze_stock_query = importlib.import_module("YOUTUBE.stock_analyzer").analyze_stock_query
+        stock_analyzer_error = None
+    except (Exception, SystemExit) as e:
+        stock_analyzer_error = str(e)
+        logger.warning(f"Could not load the stock analyzer: {stock_analyzer_error}")
+
 @app.post("/chat", response_class=JSONResponse)
 async def chat(request: ChatRequest):
     """Execute the stock analyzer with a query"""
-    log_buffer.clear()  # Clear previous logs
     logger.info(f"Chat request received with query: {request.query}")
     try:
-        # Import the analyze_stock_query function
-        sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from YOUTUBE.stock_analyzer import analyze_stock_query
+        if analyze_stock_query is None:
+            # The import fails if Weaviate is unreachable, and a failed import
+            # isn't cached, so retry it until it succeeds once
+            await run_in_threadpool(load_stock_analyzer)
+        if analyze_stock_query is None:
+            raise Exception(f"Stock analyzer is unavailable: {stock_analyzer_error}")
         
-        # Execute the analysis
-        result = analyze_stock_query(request.query)
+        # Execute the analysis off the event loop
+        result = await run_in_threadpool(analyze_stock_query, request.query)
         logger.info("Analysis completed successfully")
         return {
             "status": "success", 
             "result": result,
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
     except Exception as e:
         logger.error(f"Chat analysis failed: {str(e)}")
         return {
             "status": "error",
             "error": str(e),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
 
-def run_script(script_path: str) -> Dict[str, Any]:
+# Level and message of a tool's "<time> - LEVEL - message" log line
+_LOG_LINE_RE = re.compile(rb"^.* - (INFO|WARNING|ERROR) - (.*)$")
+_LOG_DISPATCH = {b"INFO": logger.info, b"WARNING": logger.warning, b"ERROR": logger.error}
+
+def log_script_line(line: bytes, default_log: Callable[[str], None]) -> None:
+    """Re-log a line of script output at the level it was logged with"""
+    line = line.rstrip(b"\r\n")
+    if not line or line.isspace():
+        return
+    
+    # Lines without a log level are logged at the stream's default level;
+    # only the part that gets logged is decoded
+    match = _LOG_LINE_RE.match(line)
+    if match:
+        _LOG_DISPATCH[match.group(1)](match.group(2).decode('utf-8', 'replace'))
+    else:
+        default_log(line.decode('utf-8', 'replace'))
+
+async def log_script_output(stream: asyncio.StreamReader, default_log: Callable[[str], None]) -> None:
+    """Log a script's output stream as lines arrive"""
+    async for raw_line in stream:
+        log_script_line(raw_line, default_log)
+
+def _prepare_script(script_path: str) -> Tuple[List[str], Dict[str, str], str]:
+    """Resolve the command line, environment and working directory for running a script"""
+    # Get the absolute path of the script
+    abs_script_path = os.path.join(PROJECT_ROOT, script_path)
+    # Get the directory containing the script
+    script_dir = os.path.dirname(abs_script_path)
+    
+    # Set up the environment with the correct Python path
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join([
+        PROJECT_ROOT,  # Add project root
+        script_dir,    # Add script directory
+        os.path.join(PROJECT_ROOT, 'config')  # Add config directory
+    ])
+    
+    # Run from the project root
+    return [sys.executable, abs_script_path], env, PROJECT_ROOT
+
+# Longest output line a script may print; the StreamReader default is 64 KiB
+SCRIPT_LINE_LIMIT = 16 * 1024 * 1024
+
+async def run_script(script_path: str) -> Dict[str, Any]:
+    process = None
     try:
-        # Get the absolute path of the script
-        abs_script_path = os.path.abspath(script_path)
-        # Get the directory containing the script
-        script_dir = os.path.dirname(abs_script_path)
-        # Get the project root directory
-        project_root = os.path.dirname(os.path.abspath(__file__))
-        
-        # Set up the environment with the correct Python path
-        env = os.environ.copy()
-        python_path = os.pathsep.join([
-            project_root,  # Add project root
-            script_dir,    # Add script directory
-            os.path.join(project_root, 'config')  # Add config directory
-        ])
-        env["PYTHONPATH"] = python_path
+        argv, env, cwd = SCRIPT_SPECS[script_path]
         
-        # Run the script and capture output
-        process = subprocess.run(
-            [sys.executable, abs_script_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+        # Run the script without blocking the event loop
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             env=env,
-            cwd=project_root  # Set working directory to project root
+            cwd=cwd,
+            limit=SCRIPT_LINE_LIMIT
         )
         
-        # Log the output
-        if process.stdout:
-            for line in process.stdout.splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Parse the log line to extract level and message
-                try:
-                    # Check if the line contains a log level
-                    if " - INFO - " in line:
-                        logger.info(line.split(" - INFO - ")[-1])
-                    elif " - ERROR - " in line:
-                        logger.error(line.split(" - ERROR - ")[-1])
-                    elif " - WARNING - " in line:
-                        logger.warning(line.split(" - WARNING - ")[-1])
-                    else:
-                        # If no level is found, log as info
-                        logger.info(line)
-                except Exception:
-                    # If parsing fails, log the entire line as info
-                    logger.info(line)
-        
-        if process.stderr:
-            for line in process.stderr.splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Parse the log line to extract level and message
-                try:
-                    # Check if the line contains a log level
-                    if " - INFO - " in line:
-                        logger.info(line.split(" - INFO - ")[-1])
-                    elif " - ERROR - " in line:
-                        logger.error(line.split(" - ERROR - ")[-1])
-                    elif " - WARNING - " in line:
-                        logger.warning(line.split(" - WARNING - ")[-1])
-                    else:
-                        # If no level is found, log as error
-                        logger.error(line)
-                except Exception:
-                    # If parsing fails, log the entire line as error
-                    logger.error(line)
+        # Log both streams line by line as the script produces them
+        await asyncio.gather(
+            log_script_output(process.stdout, logger.info),
+            log_script_output(process.stderr, logger.error)
+        )
+        await process.wait()
         
         # Check if the process was successful
         if process.returncode == 0:
@@ -182,88 +189,154 @@ def run_script(script_path: str) -> Dict[str, Any]:
                 "error": str(e)
             }
         )
+    finally:
+        # If reading the output failed or the request was cancelled, don't leave
+        # the script running and blocked on a full pipe
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+# Threads per worker for blocking calls (analysis, in-process tools)
+THREADPOOL_SIZE = 16
+
+def configure_threadpool():
+    """Cap the shared threadpool so long-running tools can't starve other requests of CPU"""
+    # Called from lifespan, since the limiter belongs to the running event loop
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+# In-process entry point for each tool script: script path -> (module, function)
+TOOL_ENTRY_POINTS = {
+    "YOUTUBE/Tools/youtube_fetcher_tool.py": ("YOUTUBE.Tools.youtube_fetcher_tool", "main"),
+    "YOUTUBE/Tools/transcript_analyzer_tool.py": ("YOUTUBE.Tools.transcript_analyzer_tool", "main"),
+    "YAHOO/Tools/yahoo_tool.py": ("YAHOO.Tools.yahoo_tool", "test_context_agent"),
+    "YOUTUBE/process_analysis.py": ("YOUTUBE.process_analysis", "main"),
+}
+
+# Subprocess command line, environment and working directory per script,
+# resolved once rather than on every run_script call
+SCRIPT_SPECS = {script_path: _prepare_script(script_path) for script_path in TOOL_ENTRY_POINTS}
+
+# Entry points loaded at startup; scripts missing here fall back to run_script
+tool_functions: Dict[str, Callable[[], Any]] = {}
+
+def load_tools():
+    """Import the tool modules once so requests skip interpreter start-up and re-imports"""
+    for script_path, (module_name, function_name) in TOOL_ENTRY_POINTS.items():
+        try:
+            module = importlib.import_module(module_name)
+            tool_functions[script_path] = getattr(module, function_name)
+            logger.info(f"Loaded {script_path} in-process")
+        except (Exception, SystemExit) as e:
+            logger.warning(f"Could not load {script_path} in-process, will run it as a subprocess: {str(e)}")
+
+async def run_tool(script_path: str) -> Dict[str, Any]:
+    """Run a tool's entry point in the threadpool, or as a subprocess if it couldn't be loaded"""
+    tool = tool_functions.get(script_path)
+    if tool is None:
+        return await run_script(script_path)
+    
+    try:
+        await run_in_threadpool(tool)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise Exception(f"Script failed with return code: {e.code}")
+    return {
+        "status": "success",
+        "message": "Script executed successfully"
+    }
 
 @app.post("/execute/youtube-fetcher", response_class=JSONResponse)
 async def execute_youtube_fetcher():
     """Execute the YouTube fetcher tool"""
-    log_buffer.clear()  # Clear previous logs
     logger.info("Starting YouTube fetcher process")
     try:
-        result = run_script("YOUTUBE/Tools/youtube_fetcher_tool.py")
+        result = await run_tool("YOUTUBE/Tools/youtube_fetcher_tool.py")
         return {
             "status": result["status"],
             "message": result.get("message", ""),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
     except Exception as e:
         logger.error(f"YouTube fetcher failed: {str(e)}")
         return {
             "status": "error",
             "error": str(e),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
 
 @app.post("/execute/transcript-analyzer", response_class=JSONResponse)
 async def execute_transcript_analyzer():
     """Execute the transcript analyzer tool"""
-    log_buffer.clear()  # Clear previous logs
     logger.info("Starting transcript analyzer process")
     try:
-        result = run_script("YOUTUBE/Tools/transcript_analyzer_tool.py")
+        result = await run_tool("YOUTUBE/Tools/transcript_analyzer_tool.py")
         return {
             "status": result["status"],
             "message": result.get("message", ""),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
     except Exception as e:
         logger.error(f"Transcript analyzer failed: {str(e)}")
         return {
             "status": "error",
             "error": str(e),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
 
 @app.post("/execute/yahoo-tool", response_class=JSONResponse)
 async def execute_yahoo_tool():
     """Execute the Yahoo finance tool"""
-    log_buffer.clear()  # Clear previous logs
     logger.info("Starting Yahoo finance tool process")
     try:
-        result = run_script("YAHOO/Tools/yahoo_tool.py")
+        result = await run_tool("YAHOO/Tools/yahoo_tool.py")
         return {
             "status": result["status"],
             "message": result.get("message", ""),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
     except Exception as e:
         logger.error(f"Yahoo tool failed: {str(e)}")
         return {
             "status": "error",
             "error": str(e),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
 
 @app.post("/execute/process-analysis", response_class=JSONResponse)
 async def execute_process_analysis():
     """Execute the process analysis script"""
-    log_buffer.clear()  # Clear previous logs
     logger.info("Starting process analysis")
     try:
-        result = run_script("YOUTUBE/process_analysis.py")
+        result = await run_tool("YOUTUBE/process_analysis.py")
         return {
             "status": result["status"],
             "message": result.get("message", ""),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
     except Exception as e:
         logger.error(f"Process analysis failed: {str(e)}")
         return {
             "status": "error",
             "error": str(e),
-            "logs": log_buffer.get_recent_logs()
+            "logs": REQ_LOGS.get().get_recent_logs()
         }
 
 if __name__ == "__main__":
     logger.info("Starting Stock Analysis API server")
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001, log_level="info") 
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8001,
+        # One process per core so CPU-bound requests don't serialize on the GIL.
+        # On Windows, multiple workers use the selector event loop, which can't
+        # start subprocesses for run_script, so keep a single worker there
+        workers=1 if sys.platform == "win32" else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        # uvloop doesn't support Windows; both come with uvicorn[standard]
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        log_level="info"
+    ) 
\ No newline at end of file
@@ -0,0 +1,49 @@
+import logging
+from datetime import datetime
+from collections import deque
+from contextvars import ContextVar
+
+# Kept out of main.py so that `python main.py`, which loads main.py both as
+# __main__ and as the "main" module uvicorn serves, still has a single buffer
+# ContextVar shared by the root log handler and the request middleware
+
+# Configure logging with a rotating buffer
+class LogBuffer:
+    def __init__(self, max_size=1000):
+        self.buffer = deque(maxlen=max_size)
+
+    def add_log(self, log_entry):
+        self.buffer.append(log_entry)
+
+    def get_recent_logs(self):
+        return list(self.buffer)
+
+# Process-wide buffer for logs emitted outside a request (e.g. during startup)
+log_buffer = LogBuffer()
+
+# Buffer of the request being handled, so concurrent requests don't mix logs
+REQ_LOGS: ContextVar[LogBuffer] = ContextVar("req_logs")
+
+class LogHandler(logging.Handler):
+    # Millisecond key and ISO string of the last timestamp formatted
+    _last_timestamp = (0, "")
+
+    def _timestamp(self, created):
+        """ISO timestamp of a record, reusing the last one within the same millisecond"""
+        key = int(created * 1000)
+        last_timestamp = self._last_timestamp
+        if key != last_timestamp[0]:
+            last_timestamp = (key, datetime.fromtimestamp(created).isoformat())
+            self._last_timestamp = last_timestamp
+        return last_timestamp[1]
+
+    def emit(self, record):
+        try:
+            log_entry = {
+                'timestamp': self._timestamp(record.created),
+                'level': record.levelname,
+                'message': self.format(record)
+            }
+            REQ_LOGS.get(log_buffer).add_log(log_entry)
+        except Exception:
+            self.handleError(record)